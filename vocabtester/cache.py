@@ -0,0 +1,190 @@
+"""
+Cache of grading verdicts keyed on (word, normalized answer).
+
+The cache is shared by all vocab sets, bounded by a least recently used policy with an optional time to live, and
+dropped whenever the grading backend changes.
+
+Author: Cathy Jiao
+"""
+
+import json
+import re
+import time
+from collections import OrderedDict
+from vocabtion import progress as prog
+
+# globals
+CACHE_FILENAME = 'grading_cache.json'
+MAX_ENTRIES = 20000
+# seconds a verdict stays valid, None to keep verdicts until they are evicted
+TTL = None
+
+# (word, normalized answer) -> [verdict, grading tier, time cached], least recently used first
+entries = OrderedDict()
+backend = None
+hits = 0
+misses = 0
+loaded = False
+
+
+def load():
+    """
+    Load the cache.
+    """
+
+    global entries
+    global backend
+    global hits
+    global misses
+    global loaded
+
+    entries = OrderedDict()
+    backend = None
+    hits = 0
+    misses = 0
+    loaded = True
+
+    try:
+        with open(prog.meta_path(CACHE_FILENAME), 'r') as file:
+            data = json.load(file)
+    except FileNotFoundError:
+        return
+
+    backend = data['backend']
+    hits = data['hits']
+    misses = data['misses']
+    entries = OrderedDict(((word, answer), info) for word, answer, *info in data['entries'])
+
+
+def save():
+    """
+    Save the cache.
+    """
+
+    if not loaded:
+        return
+
+    data = {
+        'backend': backend,
+        'hits': hits,
+        'misses': misses,
+        'entries': [[word, answer] + info for (word, answer), info in entries.items()],
+    }
+    with open(prog.meta_path(CACHE_FILENAME), 'w+') as file:
+        json.dump(data, file)
+
+
+def clear():
+    """
+    Drop all cached verdicts and statistics.
+    """
+
+    global entries
+    global hits
+    global misses
+
+    _ensure_loaded()
+    entries = OrderedDict()
+    hits = 0
+    misses = 0
+    save()
+
+
+def normalize(text):
+    """
+    Normalize an answer so trivially different answers share a cache entry.
+
+    :param text: a string of text that is the definition
+    :return: (str) lower case words of text without punctuation
+    """
+
+    return ' '.join(re.sub(r'[^\w\s]', ' ', text.lower()).split())
+
+
+def get(grader, word, text):
+    """
+    Get the cached verdict of an answer.
+
+    :param grader: (str) name and version of grading backend
+    :param word: (str)
+    :param text: a string of text that is the definition
+    :return: (list) [verdict, grading tier] or None if answer is not cached
+    """
+
+    global hits
+    global misses
+
+    _check_backend(grader)
+
+    key = (word, normalize(text))
+    info = entries.get(key)
+    if info is not None and TTL is not None and time.time() - info[2] > TTL:
+        del entries[key]
+        info = None
+
+    if info is None:
+        misses += 1
+        return None
+
+    hits += 1
+    entries.move_to_end(key)
+    return info[:2]
+
+
+def put(grader, word, text, verdict, tier):
+    """
+    Cache the verdict of an answer.
+
+    :param grader: (str) name and version of grading backend
+    :param word: (str)
+    :param text: a string of text that is the definition
+    :param verdict: (bool) true if word matches the definition
+    :param tier: (int) grading tier that produced the verdict
+    """
+
+    _check_backend(grader)
+
+    key = (word, normalize(text))
+    entries[key] = [verdict, tier, time.time()]
+    entries.move_to_end(key)
+    while len(entries) > MAX_ENTRIES:
+        entries.popitem(last=False)
+
+
+def print_stats():
+    """
+    Print size and hit rate of the cache.
+    """
+
+    _ensure_loaded()
+    lookups = hits + misses
+    print('>> Cached verdicts: {}/{}'.format(len(entries), MAX_ENTRIES))
+    if lookups:
+        print('>> Hit rate: {:.0%} ({} hits, {} misses)'.format(hits / lookups, hits, misses))
+    else:
+        print('>> Hit rate: no lookups yet')
+
+
+def _check_backend(grader):
+    """
+    Drop all cached verdicts if they were produced by a different grading backend.
+
+    :param grader: (str) name and version of grading backend
+    """
+
+    global entries
+    global backend
+
+    _ensure_loaded()
+    if grader != backend:
+        entries = OrderedDict()
+        backend = grader
+
+
+def _ensure_loaded():
+    """
+    Load the cache if it has not been loaded yet.
+    """
+
+    if not loaded:
+        load()
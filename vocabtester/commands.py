@@ -6,7 +6,12 @@ Author: Cathy Jiao
 
 import cmd
 from vocabtion import progress as prog
-from vocabtion.question import question_user
+from vocabtion import history
+from vocabtion import review
+from vocabtion import index
+from vocabtion import cache
+from vocabtion import deck
+from vocabtion.question import question_user, review_user, decode_word_category
 
 
 class Shell(cmd.Cmd):
@@ -21,9 +26,9 @@ class Shell(cmd.Cmd):
 
     def do_test(self, arg):
         """
-        Begin testing on a test set: 'test gre'.
+        Begin testing on a test set: 'test gre' or 'test all' to review words from all sets.
 
-        :param arg: (str) name of test set
+        :param arg: (str) name of test set or 'all'
         """
 
         # return if no test set name is provided
@@ -31,8 +36,13 @@ class Shell(cmd.Cmd):
             print('No test set selected. Please select or add a test set')
             return
 
-        # load progress for selected test set
+        if arg == 'all':
+            _review_all()
+            return
+
+        # load progress for selected test set and plan the first cards
         prog.load(arg)
+        deck.plan()
         _print_start_msg()
 
         # start test
@@ -40,8 +50,9 @@ class Shell(cmd.Cmd):
             continue
 
         # save progress and exit
-        prog.save()
+        _save_session(prog.save)
         prog.clear()
+        deck.clear()
         _print_exit_msg()
 
     def do_delete(self, arg):
@@ -117,6 +128,116 @@ class Shell(cmd.Cmd):
         msg_err = '>> Please select [y/n]'
         _prompt_yes_no(msg, self.do_test, None, msg_err, pos_args=resp, neg_msg=msg_unchanged)
 
+    def do_analyze(self, arg):
+        """
+        Display analytics of all answers given or of answers for a specific set: 'analyze gre'.
+
+        :param arg: (optional) (str) name of vocab set
+        """
+
+        history.print_analysis(arg)
+
+    def do_sync(self, arg):
+        """
+        Update a vocab set to match its changed vocab file, keeping progress: 'sync gre path_to_vocab_set'.
+
+        :param arg: (str) name of vocab set and path of vocab file
+        """
+
+        args = arg.split(maxsplit=1)
+        if len(args) != 2:
+            print('>> Please provide a vocab set name and a vocab file path')
+            return
+
+        name, path = args
+        counts = prog.sync_vocab(name, path)
+        if counts:
+            print('>> Synced \'{}\': {} added, {} retired, {} unchanged'.format(name, *counts))
+
+    def do_convert(self, arg):
+        """
+        Store a vocab set as a binary snapshot for fast loading of huge sets, or back as json:
+        'convert gre binary' or 'convert gre json'.
+
+        :param arg: (str) name of vocab set and format
+        """
+
+        args = arg.split()
+        if len(args) != 2 or args[1] not in ('binary', 'json'):
+            print('>> Please provide a vocab set name and a format: binary or json')
+            return
+
+        name, fmt = args
+        if name not in prog.vocab_name_to_progress_file:
+            print('>> {} is not a vocab set'.format(name))
+        elif prog.convert_vocab_set(name, fmt == 'binary'):
+            print('>> Converted \'{}\' to {}'.format(name, fmt))
+        else:
+            print('>> \'{}\' is already stored as {}'.format(name, fmt))
+
+    def do_cache(self, arg):
+        """
+        Display size and hit rate of the cache of graded answers, or 'cache clear' to empty it.
+
+        :param arg: (optional) (str) 'clear'
+        """
+
+        if arg == 'clear':
+            cache.clear()
+            print('>> Cache cleared!')
+        else:
+            cache.print_stats()
+
+    def do_search(self, arg):
+        """
+        Find words starting with some letters in all vocab sets: 'search mis'.
+
+        :param arg: (str) beginning of word
+        """
+
+        if not arg:
+            print('>> Please provide the beginning of a word')
+            return
+
+        limit = 50
+        words = index.search(arg.strip().lower(), limit + 1)
+        if not words:
+            print('>> No words found!')
+            return
+
+        for word in words[:limit]:
+            sets = ', '.join('{} ({})'.format(name, decode_word_category(category))
+                             for name, category in sorted(index.sets_containing(word).items()))
+            print('{}: {}'.format(word, sets))
+        if len(words) > limit:
+            print('>> Showing the first {} words'.format(limit))
+
+    def complete_test(self, text, line, begidx, endidx):
+        return _complete_set_names(text, line, begidx)
+
+    def complete_delete(self, text, line, begidx, endidx):
+        return _complete_set_names(text, line, begidx)
+
+    def complete_clear(self, text, line, begidx, endidx):
+        return _complete_set_names(text, line, begidx)
+
+    def complete_progress(self, text, line, begidx, endidx):
+        return _complete_set_names(text, line, begidx, with_all=False)
+
+    def complete_analyze(self, text, line, begidx, endidx):
+        return _complete_set_names(text, line, begidx, with_all=False)
+
+    def complete_sync(self, text, line, begidx, endidx):
+        return _complete_set_names(text, line, begidx, with_all=False)
+
+    def complete_convert(self, text, line, begidx, endidx):
+        if len(line[:begidx].split()) == 2:
+            return [fmt for fmt in ('binary', 'json') if fmt.startswith(text)]
+        return _complete_set_names(text, line, begidx, with_all=False)
+
+    def complete_search(self, text, line, begidx, endidx):
+        return index.search(text.lower(), 100)
+
     def do_exit(self, arg):
         """
         Closes the program.
@@ -125,22 +246,90 @@ class Shell(cmd.Cmd):
         print('>> Goodbye!')
         return True
 
+    def postcmd(self, stop, line):
+        """
+        Save the index once after every command that changed it.
+
+        :param stop: (bool) true if the shell should exit
+        :param line: (str) command that was run
+        :return: (bool) stop
+        """
+
+        index.save()
+        return stop
+
 
-def _print_start_msg():
+def _review_all():
+    """
+    Review the most urgent words over all test sets.
+    """
+
+    review.load()
+    _print_start_msg('all vocab sets')
+
+    # start test
+    while review_user():
+        continue
+
+    # save progress of every set containing an answered word and exit
+    _save_session(review.save)
+    review.clear()
+    _print_exit_msg('all vocab sets')
+
+
+def _save_session(save_progress):
+    """
+    Save everything a test session changed.
+
+    :param save_progress: (func pointer) function saving progress of the tested vocab sets
+    """
+
+    save_progress()
+    history.save()
+    cache.save()
+    index.save()
+
+
+def _complete_set_names(text, line, begidx, with_all=True):
+    """
+    Complete the name of a vocab set, the first argument of a command.
+
+    :param text: (str) beginning of name to complete
+    :param line: (str) whole input line
+    :param begidx: (int) index of text in line
+    :param with_all: (bool) true if 'all' is a valid argument
+    :return: (list) completions
+    """
+
+    # only the first argument is a vocab set name
+    if len(line[:begidx].split()) > 1:
+        return []
+
+    names = list(prog.vocab_name_to_progress_file)
+    if with_all:
+        names.append('all')
+    return sorted(name for name in names if name.startswith(text))
+
+
+def _print_start_msg(name=None):
     """
     Message to print before starting a test.
+
+    :param name: (optional) (str) what is being tested, defaults to the loaded vocab set
     """
 
-    print('>> Testing vocab from: {}'.format(prog.vocab_name))
+    print('>> Testing vocab from: {}'.format(name or prog.vocab_name))
     print('>> Type \'exit\' to go back to main menu')
     print('>>')
 
 
-def _print_exit_msg():
+def _print_exit_msg(name=None):
     """
     Message to print upon finishing a test.
+
+    :param name: (optional) (str) what was tested, defaults to the loaded vocab set
     """
-    print('>> Saved progress for: {}'.format(prog.vocab_name))
+    print('>> Saved progress for: {}'.format(name or prog.vocab_name))
     print('>> Back to main menu.')
 
 
@@ -0,0 +1,141 @@
+"""
+Plan the cards of a test session ahead of time.
+
+The deck is a queue of upcoming words drawn with the category weights, where the same word never comes up again
+within MIN_SPACING cards. After each answer the cards from the next card of the answered word on are drawn again,
+and definitions of upcoming words are fetched before they are shown.
+
+Author: Cathy Jiao
+"""
+
+import random
+from collections import deque
+from vocabtion import progress as prog
+from vocabtion.lookup import prefetch_definitions
+
+# globals
+SESSION_SIZE = 20
+MIN_SPACING = 3
+
+queue = deque()
+recent = deque(maxlen=MIN_SPACING)
+session_size = SESSION_SIZE
+
+
+def clear():
+    """
+    Clear all global variables
+    """
+    global queue
+    global recent
+
+    queue = deque()
+    recent = deque(maxlen=MIN_SPACING)
+
+
+def plan(size=SESSION_SIZE):
+    """
+    Plan the cards of a session for the loaded vocab set.
+
+    :param size: (int) number of cards to plan ahead
+    """
+
+    global session_size
+
+    clear()
+    session_size = size
+    fill()
+
+
+def fill():
+    """
+    Top up the queue to the planned number of cards and prefetch definitions of the new cards.
+    """
+
+    added = []
+    while len(queue) < session_size:
+        # words shown or planned within the last MIN_SPACING cards
+        window = (list(recent) + list(queue))[-MIN_SPACING:]
+        word = _draw(set(window))
+        if word is None:
+            break
+        queue.append(word)
+        added.append(word)
+
+    prefetch_definitions(added)
+
+
+def next_word():
+    """
+    Pop the next card.
+
+    :return: (str) word to test
+    """
+
+    if not queue:
+        fill()
+
+    # set is too small to keep words apart, only avoid repeating the last word
+    if queue:
+        word = queue.popleft()
+    else:
+        word = _draw(set(list(recent)[-1:])) or _draw(set())
+
+    recent.append(word)
+    return word
+
+
+def answered(word):
+    """
+    Update the plan after a word was answered and its category may have changed.
+
+    :param word: (str) word that was answered
+    """
+
+    global queue
+
+    # later cards of the word were drawn with its old category, dropping only them could bring other words closer
+    # than MIN_SPACING, so the plan is drawn again from the first of them
+    if word in queue:
+        queue = deque(list(queue)[:queue.index(word)])
+    fill()
+
+
+def _draw(excluded):
+    """
+    Draw a word using the category weights.
+
+    Word drawn will be from one of these four categories:
+    - new: a word user has not encountered before
+    - learning: a word the user has defined (correctly or incorrectly) to a least once
+    - reviewing: a word a user has defined correctly 3 consecutive times
+    - mastered: a word a user has defined correctly 6 consecutive times
+
+    :param excluded: (set) words that cannot be drawn
+    :return: (str) a word or None if all words are excluded
+    """
+
+    # all words partitioned into their categories
+    vocab_lists = [prog.vocab_new, prog.vocab_learning, prog.vocab_reviewing, prog.vocab_mastered]
+    weights = list(prog.CATEGORY_WEIGHTS)
+
+    while any(weights):
+        # ignore categories that are empty
+        weights = [w if len(vocab_lists[i]) > 0 else 0 for i, w in enumerate(weights)]
+        if not any(weights):
+            break
+        choice = random.choices(range(4), weights)[0]
+        words = vocab_lists[choice]
+
+        # a few tries are enough unless most words of the category are excluded
+        for _ in range(8):
+            word = random.choice(words)
+            if word not in excluded:
+                return word
+
+        candidates = [word for word in words if word not in excluded]
+        if candidates:
+            return random.choice(candidates)
+        weights[choice] = 0
+
+    return None
@@ -0,0 +1,316 @@
+"""
+Record every answer in an append-only columnar log and analyze it.
+
+Answers are buffered in memory and flushed to numbered chunk files, one numpy array per column, so
+the analytics below can run over millions of rows in vectorized passes.
+
+Author: Cathy Jiao
+"""
+
+import json
+import time
+from os import listdir, makedirs, replace
+from os.path import join, exists
+
+import numpy as np
+
+from vocabtion import progress as prog
+
+# globals
+HISTORY_DIR = join(prog.PROGRESS_DIR, 'history')
+WORD_IDS_FILENAME = 'words.json'
+CHUNK_PREFIX = 'chunk_'
+CHUNK_SIZE = 4096
+
+# grading tiers, i.e. which grading path produced a verdict
+TIER_DATAMUSE = 0
+TIER_CACHE = 1
+
+# column name -> dtype of every recorded answer
+COLUMNS = {
+    'timestamp': np.float64,
+    'word_id': np.uint32,
+    'correct': np.bool_,
+    'latency': np.float32,
+    'tier': np.uint8,
+}
+
+word_to_id = {}
+id_to_word = []
+buffer = {column: [] for column in COLUMNS}
+num_chunks = 0
+loaded = False
+
+
+def load():
+    """
+    Load the word ids and count the chunks already on disk.
+    """
+
+    global word_to_id
+    global id_to_word
+    global num_chunks
+    global loaded
+
+    makedirs(HISTORY_DIR, exist_ok=True)
+
+    path = join(HISTORY_DIR, WORD_IDS_FILENAME)
+    if exists(path):
+        with open(path, 'r') as file:
+            id_to_word = json.load(file)
+    else:
+        id_to_word = []
+    word_to_id = {word: i for i, word in enumerate(id_to_word)}
+
+    num_chunks = len(_chunk_filenames())
+    loaded = True
+
+
+def record(word, correct, latency=0.0, tier=TIER_DATAMUSE):
+    """
+    Record an answer.
+
+    :param word: (str) word that was tested
+    :param correct: (bool) if user got word definition correct
+    :param latency: (float) seconds user took to answer, 0 if unknown
+    :param tier: (int) grading tier that produced the verdict
+    """
+
+    if not loaded:
+        load()
+
+    if word not in word_to_id:
+        word_to_id[word] = len(id_to_word)
+        id_to_word.append(word)
+
+    buffer['timestamp'].append(time.time())
+    buffer['word_id'].append(word_to_id[word])
+    buffer['correct'].append(correct)
+    buffer['latency'].append(latency)
+    buffer['tier'].append(tier)
+
+    if len(buffer['word_id']) >= CHUNK_SIZE:
+        save()
+
+
+def save():
+    """
+    Flush buffered answers to chunk files and save the word ids.
+
+    The last chunk is topped up to CHUNK_SIZE answers before a new chunk is started, so short sessions do not
+    leave behind many tiny files.
+    """
+
+    global buffer
+    global num_chunks
+
+    if not loaded or not buffer['word_id']:
+        return
+
+    # one array per column
+    columns = {column: np.array(values, dtype=COLUMNS[column]) for column, values in buffer.items()}
+    buffer = {column: [] for column in COLUMNS}
+
+    if num_chunks:
+        with np.load(_chunk_path(num_chunks - 1)) as chunk:
+            if chunk['word_id'].size < CHUNK_SIZE:
+                columns = {column: np.concatenate([chunk[column], values]) for column, values in columns.items()}
+                num_chunks -= 1
+
+    while columns['word_id'].size:
+        _write_chunk(num_chunks, {column: values[:CHUNK_SIZE] for column, values in columns.items()})
+        num_chunks += 1
+        columns = {column: values[CHUNK_SIZE:] for column, values in columns.items()}
+
+    with open(join(HISTORY_DIR, WORD_IDS_FILENAME), 'w+') as file:
+        json.dump(id_to_word, file)
+
+
+def load_history():
+    """
+    Load all recorded answers.
+
+    :return: (dict) column name -> numpy array of all recorded answers
+    """
+
+    if not loaded:
+        load()
+
+    chunks = {column: [] for column in COLUMNS}
+    for filename in _chunk_filenames():
+        with np.load(join(HISTORY_DIR, filename)) as chunk:
+            for column in COLUMNS:
+                chunks[column].append(chunk[column])
+
+    # include answers that have not been flushed yet
+    for column, values in buffer.items():
+        chunks[column].append(np.array(values, dtype=COLUMNS[column]))
+
+    return {column: np.concatenate(arrays) for column, arrays in chunks.items()}
+
+
+def select_words(columns, words):
+    """
+    Keep only the answers for some words.
+
+    :param columns: (dict) recorded answers
+    :param words: (iterable) words to keep
+    :return: (dict) recorded answers for words
+    """
+
+    ids = np.array([word_to_id[word] for word in words if word in word_to_id], dtype=np.uint32)
+    mask = np.isin(columns['word_id'], ids)
+    return {column: values[mask] for column, values in columns.items()}
+
+
+def error_rates(columns):
+    """
+    Compute the error rate of every word that has been answered.
+
+    :param columns: (dict) recorded answers
+    :return: (tuple) arrays of word ids, attempts and error rates
+    """
+
+    attempts = np.bincount(columns['word_id'])
+    errors = np.bincount(columns['word_id'], weights=~columns['correct'])
+    ids = np.flatnonzero(attempts)
+    return ids, attempts[ids], errors[ids] / attempts[ids]
+
+
+def latency_percentiles(columns, percentiles=(50, 90, 99)):
+    """
+    Compute percentiles of answer latencies, ignoring answers with unknown latency.
+
+    :param columns: (dict) recorded answers
+    :param percentiles: (tuple) percentiles to compute
+    :return: (numpy array) latency in seconds for each percentile or None if no latencies were recorded
+    """
+
+    latency = columns['latency'][columns['latency'] > 0]
+    if not latency.size:
+        return None
+    return np.percentile(latency, percentiles)
+
+
+def learning_curve(columns, max_attempts=10):
+    """
+    Compute the accuracy of the nth attempt at a word, over all words.
+
+    :param columns: (dict) recorded answers
+    :param max_attempts: (int) number of attempts to compute accuracy for
+    :return: (tuple) arrays of the number of answers and accuracy for each attempt
+    """
+
+    n = columns['word_id'].size
+    if not n:
+        return np.zeros(0), np.zeros(0)
+
+    # group answers by word in the order they were given
+    order = np.lexsort((columns['timestamp'], columns['word_id']))
+    ids = columns['word_id'][order]
+    correct = columns['correct'][order]
+
+    # attempt number of each answer is its offset from the start of its group
+    starts = np.flatnonzero(np.r_[True, ids[1:] != ids[:-1]])
+    attempt = np.arange(n) - np.repeat(starts, np.diff(np.r_[starts, n]))
+
+    keep = attempt < max_attempts
+    counts = np.bincount(attempt[keep], minlength=max_attempts)
+    hits = np.bincount(attempt[keep], weights=correct[keep], minlength=max_attempts)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        accuracy = hits / counts
+    return counts, accuracy
+
+
+def daily_accuracy(columns):
+    """
+    Compute the accuracy of each grading tier for each day answers were recorded.
+
+    :param columns: (dict) recorded answers
+    :return: (tuple) arrays of days (as unix timestamps), tiers, number of answers and accuracy
+    """
+
+    days = (columns['timestamp'] // 86400).astype(np.int64)
+    keys = days * 256 + columns['tier']
+    unique, inverse = np.unique(keys, return_inverse=True)
+    counts = np.bincount(inverse)
+    hits = np.bincount(inverse, weights=columns['correct'])
+    return (unique // 256) * 86400, unique % 256, counts, hits / counts
+
+
+def print_analysis(name=None, top=10):
+    """
+    Print analytics for all recorded answers, or for the words of a vocab set.
+
+    :param name: (optional) (str) name of vocab set
+    :param top: (int) number of hardest words to print
+    """
+
+    columns = load_history()
+
+    if name:
+        if name not in prog.vocab_name_to_progress_file:
+            print('>> {} is not a vocab set'.format(name))
+            return
+        words = prog.load_progress_json(prog.vocab_name_to_progress_file[name]) or {}
+        columns = select_words(columns, words)
+
+    if not columns['word_id'].size:
+        print('>> No answers recorded yet!')
+        return
+
+    print('>> Answers recorded: {}'.format(columns['word_id'].size))
+
+    # hardest words first, words answered more often break ties
+    ids, attempts, rates = error_rates(columns)
+    order = np.lexsort((-attempts, -rates))[:top]
+    print('>> Hardest words:')
+    for i in order:
+        print('{}: {:.0%} incorrect over {} attempts'.format(id_to_word[ids[i]], rates[i], attempts[i]))
+
+    latencies = latency_percentiles(columns)
+    if latencies is not None:
+        print('>> Answer time: p50 {:.1f}s, p90 {:.1f}s, p99 {:.1f}s'.format(*latencies))
+
+    counts, accuracy = learning_curve(columns)
+    print('>> Accuracy by attempt:')
+    for attempt in np.flatnonzero(counts):
+        print('{}: {:.0%} ({} answers)'.format(attempt + 1, accuracy[attempt], counts[attempt]))
+
+    print('>> Accuracy by day:')
+    for day, tier, count, acc in zip(*daily_accuracy(columns)):
+        print('{} (tier {}): {:.0%} ({} answers)'.format(time.strftime('%Y-%m-%d', time.gmtime(day)), tier, acc,
+                                                         count))
+    print()
+
+
+def _chunk_path(i):
+    """
+    :param i: (int) number of chunk
+    :return: (str) path of chunk
+    """
+
+    return join(HISTORY_DIR, '{}{:08d}.npz'.format(CHUNK_PREFIX, i))
+
+
+def _write_chunk(i, columns):
+    """
+    Write a chunk, replacing the old file only once the new one is complete.
+
+    :param i: (int) number of chunk
+    :param columns: (dict) column name -> numpy array
+    """
+
+    tmp_path = join(HISTORY_DIR, 'tmp.npz')
+    np.savez(tmp_path, **columns)
+    replace(tmp_path, _chunk_path(i))
+
+
+def _chunk_filenames():
+    """
+    :return: (list) sorted filenames of all chunks on disk
+    """
+
+    if not exists(HISTORY_DIR):
+        return []
+    return sorted(f for f in listdir(HISTORY_DIR) if f.startswith(CHUNK_PREFIX))
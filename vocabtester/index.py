@@ -0,0 +1,195 @@
+"""
+Index of which vocab sets contain each word, with a prefix trie over all words.
+
+The index is loaded on first use and kept up to date as vocab sets are added, tested, cleared, synced and deleted, so
+searching never has to open progress files. Updates only touch the words that changed and are written out once per
+command by save().
+
+Author: Cathy Jiao
+"""
+
+import json
+from vocabtion import progress as prog
+
+# globals
+INDEX_FILENAME = 'word_index.json'
+# marks the end of a word in the trie, never clashes with a character
+END = ''
+
+# word -> name of vocab set -> category of word in vocab set
+word_to_sets = {}
+# nested dicts, one level per character
+trie = {}
+loaded = False
+# true if the index changed since it was last saved
+dirty = False
+
+
+def load():
+    """
+    Load the index, building it from all progress files the first time.
+    """
+
+    global word_to_sets
+    global trie
+    global loaded
+    global dirty
+
+    word_to_sets = {}
+    trie = {}
+    loaded = True
+    dirty = False
+
+    try:
+        with open(prog.meta_path(INDEX_FILENAME), 'r') as file:
+            word_to_sets = json.load(file)
+    except FileNotFoundError:
+        for name, path in prog.vocab_name_to_progress_file.items():
+            for word, info in (prog.load_progress_json(path) or {}).items():
+                word_to_sets.setdefault(word, {})[name] = info[0]
+        dirty = True
+
+    for word in word_to_sets:
+        _trie_insert(word)
+
+
+def save():
+    """
+    Save the index if it changed.
+    """
+
+    global dirty
+
+    if not dirty:
+        return
+
+    with open(prog.meta_path(INDEX_FILENAME), 'w+') as file:
+        json.dump(word_to_sets, file)
+    dirty = False
+
+
+def update_words(name, word_to_category, removed=()):
+    """
+    Add or update some words of a vocab set.
+
+    :param name: (str) name of vocab set
+    :param word_to_category: (dict) word -> category of word in vocab set, for words that were added or changed
+    :param removed: (iterable) words no longer in vocab set
+    """
+
+    global dirty
+
+    _ensure_loaded()
+    for word, category in word_to_category.items():
+        sets = word_to_sets.get(word)
+        if sets is None:
+            sets = word_to_sets[word] = {}
+            _trie_insert(word)
+        sets[name] = category
+
+    for word in removed:
+        sets = word_to_sets.get(word)
+        if sets is None:
+            continue
+        sets.pop(name, None)
+        if not sets:
+            del word_to_sets[word]
+            _trie_remove(word)
+
+    dirty = True
+
+
+def remove_all():
+    """
+    Remove all vocab sets.
+    """
+
+    global word_to_sets
+    global trie
+    global loaded
+    global dirty
+
+    word_to_sets = {}
+    trie = {}
+    loaded = True
+    dirty = True
+
+
+def sets_containing(word):
+    """
+    :param word: (str)
+    :return: (dict) name of vocab set -> category of word, for all sets containing word
+    """
+
+    _ensure_loaded()
+    return word_to_sets.get(word, {})
+
+
+def search(prefix, limit=None):
+    """
+    Find words starting with a prefix.
+
+    :param prefix: (str)
+    :param limit: (optional) (int) maximum number of words to return
+    :return: (list) sorted words starting with prefix
+    """
+
+    _ensure_loaded()
+
+    # walk down to the node of the prefix
+    node = trie
+    for char in prefix:
+        if char not in node:
+            return []
+        node = node[char]
+
+    # depth first, children in alphabetical order
+    words = []
+    stack = [(prefix, node)]
+    while stack and (limit is None or len(words) < limit):
+        word, node = stack.pop()
+        if END in node:
+            words.append(word)
+        stack.extend((word + char, child) for char, child in sorted(node.items(), reverse=True) if char != END)
+    return words
+
+
+def _ensure_loaded():
+    """
+    Load the index if it has not been loaded yet.
+    """
+
+    if not loaded:
+        load()
+
+
+def _trie_insert(word):
+    """
+    :param word: (str) word to add to trie
+    """
+
+    node = trie
+    for char in word:
+        node = node.setdefault(char, {})
+    node[END] = True
+
+
+def _trie_remove(word):
+    """
+    :param word: (str) word to remove from trie
+    """
+
+    # remember the path so empty nodes can be pruned
+    path = []
+    node = trie
+    for char in word:
+        if char not in node:
+            return
+        path.append((node, char))
+        node = node[char]
+    node.pop(END, None)
+
+    for parent, char in reversed(path):
+        if parent[char]:
+            break
+        del parent[char]
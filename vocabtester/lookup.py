@@ -7,26 +7,82 @@ Author: Cathy Jiao
 from vocabtion.datamuse import Datamuse
 from nltk.corpus import wordnet as wn
 from vocabtion import progress as prog
+from vocabtion import history
+from vocabtion import cache
 
 # Object for calling datamuse api
 datamuse_api = Datamuse()
 
+# bump when match_definition changes so cached verdicts are dropped
+GRADER_VERSION = 1
 
-def lookup(text, word):
+# word -> definition of words that were looked up or prefetched
+definitions = {}
+
+
+def lookup(text, word, latency=0.0):
     """
     Given a definition and a word check if the definition matches to the word and provide feedback.
 
     :param text: a string of text that is the definition
     :param word: (str)
+    :param latency: (float) seconds user took to give the definition, 0 if unknown
     :return: (str) message indicating if definition was correct
     """
 
     # check if definition matches word
-    matched = match_definition(text, word)
+    matched = grade(text, word, latency)
 
     # update the progress of word
     prog.update_progress(word, matched)
 
+    return feedback(word, matched)
+
+
+def grade(text, word, latency=0.0):
+    """
+    Check if a definition matches a word and record the answer.
+
+    Answers given before for the same word are not sent to datamuse again.
+
+    :param text: a string of text that is the definition
+    :param word: (str)
+    :param latency: (float) seconds user took to give the definition, 0 if unknown
+    :return: (bool) true if word matches the definition, false otherwise
+    """
+
+    grader = grader_name()
+    cached = cache.get(grader, word, text)
+    if cached:
+        matched = cached[0]
+        tier = history.TIER_CACHE
+    else:
+        matched = match_definition(text, word)
+        tier = history.TIER_DATAMUSE
+        cache.put(grader, word, text, matched, tier)
+
+    history.record(word, matched, latency, tier)
+    return matched
+
+
+def grader_name():
+    """
+    :return: (str) name and version of the grading backend, cached verdicts are only valid for the same name
+    """
+
+    return '{}:{}:{}:{}'.format(type(datamuse_api).__name__, getattr(datamuse_api, 'api_root', ''),
+                                getattr(datamuse_api, 'max', ''), GRADER_VERSION)
+
+
+def feedback(word, matched):
+    """
+    Create the response to an answer.
+
+    :param word: (str)
+    :param matched: (bool) true if user defined word correctly
+    :return: (str) message indicating if definition was correct
+    """
+
     # get true definition of word
     definition = get_definition(word)
 
@@ -72,6 +128,9 @@ def get_definition(word):
     :return: (str) definition of input word
     """
 
+    if word in definitions:
+        return definitions[word]
+
     # get synsets of word from wordnet
     syns = wn.synsets(word)
 
@@ -80,4 +139,17 @@ def get_definition(word):
         definition = syns[0].definition()
     else:
         definition = 'Please google this word!'
+    definitions[word] = definition
     return definition
+
+
+def prefetch_definitions(words):
+    """
+    Look up the definitions of words that will be tested soon, so feedback is not held up by wordnet.
+
+    :param words: (iterable) words to look up
+    """
+
+    for word in words:
+        if word not in definitions:
+            get_definition(word)
@@ -6,8 +6,10 @@ Author: Cathy Jiao
 
 import json
 import pprint
-from os.path import dirname, abspath, join
-from os import remove
+from os.path import dirname, abspath, join, exists, splitext
+from os import remove, makedirs
+from vocabtion import index
+from vocabtion import snapshot
 
 # TODO: many globals, probably not best coding practice, consider wrapping in a class
 # globals
@@ -15,6 +17,11 @@ PARENT_DIR = dirname(abspath(__file__))
 PROGRESS_DIR = join(PARENT_DIR, 'data')
 VOCAB_SETS_JSON_FILENAME = 'vocab_sets.json'
 VOCAB_SETS_PATH = join(PROGRESS_DIR, VOCAB_SETS_JSON_FILENAME)
+# bookkeeping files live in their own directory so they cannot clash with a vocab set's progress file
+META_DIR_NAME = 'meta'
+SET_HEADS_FILENAME = 'set_heads.json'
+# proportion of words to be chosen from each category: new, learning, reviewing, mastered
+CATEGORY_WEIGHTS = [0.2, 0.35, 0.35, 0.1]
 
 vocab_name_to_progress_file = {}
 progress_file_to_vocab_name = {}
@@ -24,6 +31,8 @@ vocab_new = []
 vocab_learning = []
 vocab_reviewing = []
 vocab_mastered = []
+# words whose progress changed since the vocab set was loaded
+changed_words = set()
 
 # prints out things nicely
 pp = pprint.PrettyPrinter(indent=4)
@@ -39,6 +48,7 @@ def clear():
     global vocab_learning
     global vocab_reviewing
     global vocab_mastered
+    global changed_words
 
     vocab_name = ''
     word_to_progress = {}
@@ -46,6 +56,7 @@ def clear():
     vocab_learning = []
     vocab_reviewing = []
     vocab_mastered = []
+    changed_words = set()
 
 
 def load_vocab_sets_data():
@@ -83,12 +94,72 @@ def add_vocab(name, path):
     _word_to_progress = {word: [0, 0] for word in _vocab}
     progress_file_path = join(PROGRESS_DIR, '{}.json'.format(name))
     save_progress(progress_file_path, _word_to_progress)
+    save_set_head(name, _word_to_progress)
+    index.update_words(name, {word: 0 for word in _word_to_progress})
 
     # save vocab set data
     vocab_name_to_progress_file[name] = progress_file_path
     save_vocab_sets_data(vocab_name_to_progress_file)
 
 
+def sync_vocab(name, path):
+    """
+    Update a vocab set to match a changed vocab file, keeping the progress of words in both.
+
+    Words no longer in the file are retired: their progress is kept aside and restored if they come back.
+
+    :param name: (str) name of vocab set
+    :param path: (str) path of file containing vocab words
+    :return: (tuple) number of added, retired and unchanged words or None if set or file does not exist
+    """
+
+    if name not in vocab_name_to_progress_file:
+        print('>> {} is not a vocab set'.format(name))
+        return None
+
+    # stream words of the new file into a set
+    try:
+        with open(path, 'r') as file:
+            _vocab = {l.strip().lower() for l in file}
+        _vocab.discard('')
+    except FileNotFoundError:
+        print('File does not exist: {}'.format(path))
+        return None
+
+    progress_path = vocab_name_to_progress_file[name]
+    _word_to_progress = dict(load_progress_json(progress_path) or {})
+    added = _vocab.difference(_word_to_progress)
+    removed = set(_word_to_progress).difference(_vocab)
+    unchanged = len(_word_to_progress) - len(removed)
+
+    # nothing to write if the file did not change
+    if not added and not removed:
+        return 0, 0, unchanged
+
+    retired_path = _retired_path(name)
+    retired = load_progress_json(retired_path) or {}
+    for word in removed:
+        retired[word] = _word_to_progress.pop(word)
+    for word in added:
+        _word_to_progress[word] = retired.pop(word, [0, 0])
+
+    save_progress(progress_path, _word_to_progress)
+    save_set_head(name, _word_to_progress)
+    save_progress(retired_path, retired)
+    index.update_words(name, {word: _word_to_progress[word][0] for word in added}, removed)
+
+    return len(added), len(removed), unchanged
+
+
+def _retired_path(name):
+    """
+    :param name: (str) name of vocab set
+    :return: (str) path of the file holding progress of words retired from vocab set
+    """
+
+    return meta_path('{}.retired.json'.format(name))
+
+
 def read_words(path):
     """
     Read words from a text file
@@ -114,6 +185,8 @@ def save():
 
     progress_path = vocab_name_to_progress_file[vocab_name]
     save_progress(progress_path, word_to_progress)
+    save_set_head(vocab_name, word_to_progress)
+    index.update_words(vocab_name, {word: word_to_progress[word][0] for word in changed_words})
     save_vocab_sets_data(vocab_name_to_progress_file)
 
 
@@ -125,10 +198,113 @@ def save_progress(path, _word_to_progress):
     :param _word_to_progress: (json)
     """
 
+    if snapshot.is_snapshot(path):
+        if isinstance(_word_to_progress, snapshot.Snapshot) and _word_to_progress.path == path:
+            # records were updated in place
+            _word_to_progress.flush()
+        else:
+            snapshot.write_snapshot(path, _word_to_progress)
+        return
+
     with open(path, 'w+') as file:
         json.dump(_word_to_progress, file, indent=4)
 
 
+def convert_vocab_set(name, binary):
+    """
+    Convert the progress file of a vocab set between json and a binary snapshot.
+
+    :param name: (str) name of vocab set
+    :param binary: (bool) true to convert to a snapshot, false to convert to json
+    :return: (bool) true if vocab set was converted, false if it already had the requested format
+    """
+
+    path = vocab_name_to_progress_file[name]
+    if snapshot.is_snapshot(path) == binary:
+        return False
+
+    if binary:
+        new_path = splitext(path)[0] + snapshot.SNAPSHOT_EXTENSION
+        snapshot.json_to_snapshot(path, new_path)
+    else:
+        new_path = splitext(path)[0] + '.json'
+        snapshot.snapshot_to_json(path, new_path)
+
+    vocab_name_to_progress_file[name] = new_path
+    progress_file_to_vocab_name.pop(path, None)
+    progress_file_to_vocab_name[new_path] = name
+    save_vocab_sets_data(vocab_name_to_progress_file)
+    remove(path)
+    return True
+
+
+def meta_path(filename):
+    """
+    :param filename: (str) name of a bookkeeping file
+    :return: (str) path of the file in the meta directory, which is created if needed
+    """
+
+    meta_dir = join(PROGRESS_DIR, META_DIR_NAME)
+    makedirs(meta_dir, exist_ok=True)
+    return join(meta_dir, filename)
+
+
+def load_set_heads():
+    """
+    Load a summary of every vocab set, so sets can be ranked without loading them.
+
+    :return: (dict) name of vocab set -> for each category, [number of words, lowest consecutive count]
+    """
+
+    try:
+        with open(meta_path(SET_HEADS_FILENAME), 'r') as file:
+            return json.load(file)
+    except FileNotFoundError:
+        return {}
+
+
+def save_set_head(name, _word_to_progress):
+    """
+    Save the summary of a vocab set.
+
+    :param name: (str) name of vocab set
+    :param _word_to_progress: (json) progress of vocab set, None to forget the set
+    """
+
+    heads = load_set_heads()
+    if _word_to_progress:
+        heads[name] = summarize_progress(_word_to_progress)
+    else:
+        heads.pop(name, None)
+    save_set_heads(heads)
+
+
+def summarize_progress(_word_to_progress):
+    """
+    :param _word_to_progress: (json) progress of vocab set
+    :return: (list) for each category, [number of words, lowest consecutive count]
+    """
+
+    head = [[0, 0], [0, 0], [0, 0], [0, 0]]
+    for category, consecutive in _word_to_progress.values():
+        summary = head[category]
+        if not summary[0] or consecutive < summary[1]:
+            summary[1] = consecutive
+        summary[0] += 1
+    return head
+
+
+def save_set_heads(heads):
+    """
+    Save the summaries of all vocab sets.
+
+    :param heads: (dict) name of vocab set -> for each category, [number of words, lowest consecutive count]
+    """
+
+    with open(meta_path(SET_HEADS_FILENAME), 'w+') as file:
+        json.dump(heads, file, indent=4)
+
+
 def save_vocab_sets_data(_vocab_name_to_progress_file):
     """
     Save vocab set info.
@@ -177,10 +353,15 @@ def load_progress_json(path):
     """
     Load a json file containing the progress of a vocab set.
 
+    Binary snapshots are memory mapped instead, see snapshot.py.
+
     :param path: (str) path of the progress file
     :return: progress json or None if file is not found
     """
 
+    if snapshot.is_snapshot(path):
+        return snapshot.open_snapshot(path)
+
     # full path of file
     try:
         with open(path, 'r') as file:
@@ -198,10 +379,11 @@ def load_vocab_categories(vocab_json):
     :return: (list) four lists of vocab words
     """
 
-    new = [word for word, info in vocab_json.items() if info[0] == 0]
-    learning = [word for word, info in vocab_json.items() if info[0] == 1]
-    reviewing = [word for word, info in vocab_json.items() if info[0] == 2]
-    mastered = [word for word, info in vocab_json.items() if info[0] == 3]
+    # one pass, snapshots decode every word they yield
+    categories = [[], [], [], []]
+    for word, info in vocab_json.items():
+        categories[info[0]].append(word)
+    new, learning, reviewing, mastered = categories
 
     return learning, reviewing, mastered, new
 
@@ -257,10 +439,14 @@ def delete_all_vocab_sets():
     global word_to_progress
     clear()
     save_vocab_sets_data({})
+    save_set_heads({})
+    index.remove_all()
 
     # delete all progress files
     for name in vocab_name_to_progress_file:
         remove(vocab_name_to_progress_file[name])
+        if exists(_retired_path(name)):
+            remove(_retired_path(name))
 
     vocab_name_to_progress_file = {}
     progress_file_to_vocab_name = {}
@@ -276,7 +462,11 @@ def delete_vocab_set(name):
     del vocab_name_to_progress_file[name]
     del progress_file_to_vocab_name[path]
     save_vocab_sets_data(vocab_name_to_progress_file)
+    save_set_head(name, None)
+    index.update_words(name, {}, load_progress_json(path) or {})
     remove(path)
+    if exists(_retired_path(name)):
+        remove(_retired_path(name))
 
 
 def clear_all_progress():
@@ -299,6 +489,12 @@ def clear_progress(name):
     _word_to_progress = load_progress_json(path)
     _word_to_progress = {key: [0, 0] for key in _word_to_progress.keys()}
     save_progress(path, _word_to_progress)
+    save_set_head(name, _word_to_progress)
+    index.update_words(name, {word: 0 for word in _word_to_progress})
+
+    # retired words come back as new words too
+    if exists(_retired_path(name)):
+        remove(_retired_path(name))
 
 
 def update_progress(word, flag, threshold=3):
@@ -310,8 +506,28 @@ def update_progress(word, flag, threshold=3):
     :param threshold: (int) number of consecutive times user must get word definition correct to go to next level
     """
 
-    # get current word progress
-    word_info = word_to_progress[word]
+    old_category = word_to_progress[word][0]
+    word_to_progress[word] = advance_progress(word_to_progress[word], flag, threshold)
+    new_category = word_to_progress[word][0]
+    changed_words.add(word)
+
+    # move the word to its new category
+    if new_category != old_category:
+        vocab_lists = [vocab_new, vocab_learning, vocab_reviewing, vocab_mastered]
+        vocab_lists[old_category].remove(word)
+        vocab_lists[new_category].append(word)
+
+
+def advance_progress(word_info, flag, threshold=3):
+    """
+    Compute the progress of a word after the user defines it.
+
+    :param word_info: (list) current [category, consecutive] of word
+    :param flag: (bool) if user got word definition correct
+    :param threshold: (int) number of consecutive times user must get word definition correct to go to next level
+    :return: (list) new [category, consecutive] of word
+    """
+
     # type of word - new, learning, reviewing or mastered
     category = word_info[0]
     # number of consecutive times user got word definition correct at current level
@@ -332,7 +548,7 @@ def update_progress(word, flag, threshold=3):
             consecutive += 1
 
             # increase category if they got word correct some consecutive amount of times
-            if consecutive >= threshold and category <= 3:
+            if consecutive >= threshold and category < 3:
                 consecutive = 0
                 category = category + 1
         else:
@@ -341,6 +557,4 @@ def update_progress(word, flag, threshold=3):
                 category = category - 1
                 consecutive = 0
 
-    # reload the word categories
-    word_to_progress[word] = [category, consecutive]
-    load_vocab_categories(word_to_progress)
+    return [category, consecutive]
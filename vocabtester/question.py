@@ -5,8 +5,10 @@ Author: Cathy Jiao
 """
 
 from vocabtion import progress as prog
-from vocabtion.lookup import lookup
-import random
+from vocabtion import review
+from vocabtion import deck
+from vocabtion.lookup import lookup, grade, feedback
+import time
 
 
 def question_user():
@@ -16,8 +18,8 @@ def question_user():
     Return a bool: false if user wishes to quit being asked questions, true otherwise
     """
 
-    # choose a word to test user
-    word = choose_word()
+    # take the next planned word to test user
+    word = deck.next_word()
 
     # get category of chosen word
     category_code = prog.word_to_progress[word][0]
@@ -25,62 +27,64 @@ def question_user():
 
     # ask user to define word and read user response
     print('>> {} ({})'.format(word.upper(), category))
+    start = time.monotonic()
     text = input('>> definition: ')
+    latency = time.monotonic() - start
 
     if text == 'e':
         # user wants to exit
         return False
     else:
         # give user feedback on their answer
-        feedback = lookup(text, word)
+        feedback = lookup(text, word, latency)
         print(feedback)
         print('>>')
+
+        # plan the next cards while user reads the feedback
+        deck.answered(word)
         return True
 
 
-def decode_word_category(code):
-    """
-    Given an integer, map it to its corresponding category
-    :param code: (int) 0-3
-    :return: (str) category
+def review_user():
     """
+    Asks user to define the most urgent word over all vocab sets.
 
-    mapping = {0: 'new', 1: 'learning', 2: 'reviewing', 3: 'mastered'}
-    return mapping[code]
-
-
-def choose_word(weights=[0.2, 0.35, 0.35, 0.1]):
+    Return a bool: false if user wishes to quit being asked questions or no words are left, true otherwise
     """
-    Choose a word to test the user.
 
-    Word chosen will be from one of these four categories:
-    - new: a word user has not encountered before
-    - learning: a word the user has defined (correctly or incorrectly) to a least once
-    - reviewing: a word a user has defined correctly 3 consecutive times
-    - mastered: a word a user has defined correctly 6 consecutive times
+    # choose a word to test user
+    word = review.next_word()
+    if word is None:
+        print('>> No words to review!')
+        return False
 
-    :param weights: (list) a list of 4 integers representing the proportion of words to be chosen from each category.
-    The sum of all integers in the list must be equal to 1.
-    """
+    # get category of chosen word
+    category = decode_word_category(review.get_progress(word)[0])
 
-    # all words partitioned into their categories
-    vocab_lists = [prog.vocab_new, prog.vocab_learning, prog.vocab_reviewing, prog.vocab_mastered]
+    # ask user to define word and read user response
+    print('>> {} ({})'.format(word.upper(), category))
+    start = time.monotonic()
+    text = input('>> definition: ')
+    latency = time.monotonic() - start
 
-    # re-weigh the weights (ignore vocab lists that are empty)
-    weights = [w if len(vocab_lists[i]) > 0 else 0 for i, w in enumerate(weights)]
-    weights = [float(i) / sum(weights) for i in weights]
+    if text == 'e':
+        # user wants to exit
+        return False
+    else:
+        # give user feedback on their answer and update every set containing the word
+        matched = grade(text, word, latency)
+        review.update_progress(word, matched)
+        print(feedback(word, matched))
+        print('>>')
+        return True
 
-    # choose a word category
-    choice = random.choices(range(4), weights)[0]
 
-    # choose a word from the chosen category
-    if choice == 0:
-        word = random.choice(prog.vocab_new)
-    elif choice == 1:
-        word = random.choice(prog.vocab_learning)
-    elif choice == 2:
-        word = random.choice(prog.vocab_reviewing)
-    else:
-        word = random.choice(prog.vocab_mastered)
+def decode_word_category(code):
+    """
+    Given an integer, map it to its corresponding category
+    :param code: (int) 0-3
+    :return: (str) category
+    """
 
-    return word
+    mapping = {0: 'new', 1: 'learning', 2: 'reviewing', 3: 'mastered'}
+    return mapping[code]
@@ -0,0 +1,297 @@
+"""
+Review words from all vocab sets in one session.
+
+Like a single set test, each card first draws a category with the category weights. Each vocab set keeps one heap
+of its words per category, lowest consecutive count first, and the word comes from a k-way merge over the heads of
+those heaps. A set is only loaded once its advertised head (see progress.load_set_heads) comes up, a word shared by
+several sets is only queued once but its progress is written back to every set containing it, and a word is not
+asked again within REVIEW_SPACING cards unless nothing else is left.
+
+Author: Cathy Jiao
+"""
+
+import heapq
+import random
+from collections import deque
+from vocabtion import progress as prog
+from vocabtion import index
+
+# globals
+REVIEW_SPACING = 3
+
+# for each category, heap of (head key, name of vocab set) over all vocab sets with words of that category
+category_heaps = [[], [], [], []]
+# approximate number of words in each category over all vocab sets
+category_counts = [0, 0, 0, 0]
+# name of vocab set -> number of words in each category advertised before the set was loaded
+advertised = {}
+# name of vocab set -> for each category, heap of (key, word) for loaded sets
+set_queues = {}
+# name of vocab set -> word -> [category, consecutive] for loaded sets
+set_progress = {}
+# names of loaded sets whose progress changed
+dirty_sets = set()
+# word -> name of the vocab set whose heaps queue it
+owner = {}
+# word -> (category, key) of its only live entry in the heaps of its owner
+live_key = {}
+# word -> list of answers (true if defined correctly) given this session
+answers = {}
+# words asked most recently
+recent = deque(maxlen=REVIEW_SPACING)
+# number of words answered this session
+turn = 0
+
+
+def clear():
+    """
+    Clear all global variables
+    """
+    global category_heaps
+    global category_counts
+    global advertised
+    global set_queues
+    global set_progress
+    global dirty_sets
+    global owner
+    global live_key
+    global answers
+    global recent
+    global turn
+
+    category_heaps = [[], [], [], []]
+    category_counts = [0, 0, 0, 0]
+    advertised = {}
+    set_queues = {}
+    set_progress = {}
+    dirty_sets = set()
+    owner = {}
+    live_key = {}
+    answers = {}
+    recent = deque(maxlen=REVIEW_SPACING)
+    turn = 0
+
+
+def load():
+    """
+    Rank all vocab sets by their most urgent word of each category without loading them.
+    """
+
+    clear()
+    heads = prog.load_set_heads()
+    missing_heads = False
+
+    for name in prog.vocab_name_to_progress_file:
+        head = heads.get(name)
+        if head is None:
+            # nothing is known about the set, rank it by its words and remember its head for next time
+            _load_set(name)
+            heads[name] = prog.summarize_progress(set_progress[name])
+            missing_heads = True
+            continue
+
+        advertised[name] = [count for count, _ in head]
+        for category, (count, consecutive) in enumerate(head):
+            if count:
+                category_counts[category] += count
+                category_heaps[category].append(((consecutive, random.random()), name))
+
+    for heap in category_heaps:
+        heapq.heapify(heap)
+
+    # write all missing heads at once
+    if missing_heads:
+        prog.save_set_heads(heads)
+
+
+def next_word():
+    """
+    Pop the next word to review: draw a category with the category weights, then take its most urgent word.
+
+    :return: (str) word to test or None if there are no words left
+    """
+
+    weights = [w if count > 0 else 0 for w, count in zip(prog.CATEGORY_WEIGHTS, category_counts)]
+    while any(weights):
+        category = random.choices(range(4), weights)[0]
+        word = _pop(category, recent)
+        if word is not None:
+            recent.append(word)
+            return word
+        weights[category] = 0
+
+    # only recently asked words are left
+    for category in range(4):
+        word = _pop(category, ())
+        if word is not None:
+            recent.append(word)
+            return word
+
+    return None
+
+
+def get_progress(word):
+    """
+    :param word: (str) a word returned by next_word
+    :return: (list) [category, consecutive] of word in the set that queued it
+    """
+
+    return set_progress[owner[word]][word]
+
+
+def update_progress(word, flag):
+    """
+    Update progress of a word in every loaded set containing it and queue it again.
+
+    :param word: (str) a word returned by next_word
+    :param flag: (bool) if user got word definition correct
+    """
+
+    global turn
+
+    turn += 1
+    answers.setdefault(word, []).append(flag)
+    old_category = get_progress(word)[0]
+
+    for name, _word_to_progress in set_progress.items():
+        if word in _word_to_progress:
+            _word_to_progress[word] = prog.advance_progress(_word_to_progress[word], flag)
+            dirty_sets.add(name)
+
+    category, consecutive = get_progress(word)
+    category_counts[old_category] -= 1
+    category_counts[category] += 1
+
+    # queue word behind words of the same consecutive count
+    name = owner[word]
+    key = (consecutive, turn + random.random())
+    live_key[word] = (category, key)
+    heapq.heappush(set_queues[name][category], (key, word))
+    heapq.heappush(category_heaps[category], (key, name))
+
+
+def save():
+    """
+    Save progress of every vocab set containing a word answered this session.
+    """
+
+    names = set(dirty_sets)
+
+    # sets that were never loaded may still contain answered words
+    for word in answers:
+        names.update(index.sets_containing(word))
+
+    for name in names:
+        if name in set_progress:
+            if name not in dirty_sets:
+                continue
+            _word_to_progress = set_progress[name]
+        else:
+            _word_to_progress = prog.load_progress_json(prog.vocab_name_to_progress_file[name])
+            if not _word_to_progress or not _apply_answers(_word_to_progress):
+                continue
+        prog.save_progress(prog.vocab_name_to_progress_file[name], _word_to_progress)
+        prog.save_set_head(name, _word_to_progress)
+        index.update_words(name, {word: _word_to_progress[word][0] for word in answers if word in _word_to_progress})
+
+
+def _pop(category, excluded):
+    """
+    Pop the most urgent word of a category over all vocab sets.
+
+    :param category: (int) category to pop from
+    :param excluded: (iterable) words that are skipped
+    :return: (str) word or None if the category only holds excluded words
+    """
+
+    heap = category_heaps[category]
+    skipped = []
+    word = None
+
+    while heap:
+        key, name = heapq.heappop(heap)
+        if name not in set_queues:
+            # loading pushes the real heads of the set
+            _load_set(name)
+            continue
+        queue = set_queues[name][category]
+
+        # drop entries of words that were answered or are queued by another set
+        while queue and live_key.get(queue[0][1]) != (category, queue[0][0]):
+            heapq.heappop(queue)
+        if not queue:
+            continue
+
+        # the set is less urgent than it was ranked, rank it again
+        if queue[0][0] > key:
+            heapq.heappush(heap, (queue[0][0], name))
+            continue
+
+        entry = heapq.heappop(queue)
+        if queue:
+            heapq.heappush(heap, (queue[0][0], name))
+        if entry[1] in excluded:
+            skipped.append((name, entry))
+            continue
+
+        word = entry[1]
+        del live_key[word]
+        break
+
+    # put skipped words back
+    for name, entry in skipped:
+        heapq.heappush(set_queues[name][category], entry)
+        heapq.heappush(heap, (entry[0], name))
+
+    if word is None and not skipped:
+        category_counts[category] = 0
+    return word
+
+
+def _load_set(name):
+    """
+    Load a vocab set and queue its words that are not queued by another set.
+
+    :param name: (str) name of vocab set
+    """
+
+    _word_to_progress = prog.load_progress_json(prog.vocab_name_to_progress_file[name]) or {}
+    set_progress[name] = _word_to_progress
+
+    # catch up on words answered before the set was loaded
+    if _apply_answers(_word_to_progress):
+        dirty_sets.add(name)
+
+    queues = [[], [], [], []]
+    for word, (category, consecutive) in _word_to_progress.items():
+        if word not in owner:
+            owner[word] = name
+            key = (consecutive, random.random())
+            live_key[word] = (category, key)
+            queues[category].append((key, word))
+
+    # replace the advertised counts with the words the set actually queues
+    for category, queue in enumerate(queues):
+        category_counts[category] += len(queue) - advertised.get(name, [0, 0, 0, 0])[category]
+        if queue:
+            heapq.heapify(queue)
+            heapq.heappush(category_heaps[category], (queue[0][0], name))
+    advertised.pop(name, None)
+    set_queues[name] = queues
+
+
+def _apply_answers(_word_to_progress):
+    """
+    Apply this session's answers to the progress of a vocab set.
+
+    :param _word_to_progress: (json) progress of vocab set
+    :return: (bool) true if any progress changed
+    """
+
+    changed = False
+    for word, flags in answers.items():
+        if word in _word_to_progress:
+            for flag in flags:
+                _word_to_progress[word] = prog.advance_progress(_word_to_progress[word], flag)
+            changed = True
+    return changed
@@ -0,0 +1,235 @@
+"""
+Load harness that drives the shell with simulated learners.
+
+Every learner runs in its own process and its own data directory, testing the real flow (Shell.do_test ->
+question_user -> lookup -> save) with scripted input() and a stubbed datamuse backend.
+
+Run 'python -m vocabtester.simulate --help' for options.
+
+Author: Cathy Jiao
+"""
+
+import argparse
+import builtins
+import random
+import re
+import sys
+import tempfile
+import time
+from multiprocessing import Pool
+from os import makedirs
+from os.path import join
+
+import numpy as np
+
+from vocabtion import progress as prog
+from vocabtion import history
+from vocabtion import lookup
+from vocabtion import commands
+from vocabtion.commands import Shell
+
+DEFAULT_VOCAB_PATH = join(prog.PARENT_DIR, 'vocab', 'gre_sample.txt')
+SET_NAME = 'simulated'
+WRONG_ANSWER = 'no idea'
+
+# question printed by question_user, e.g. '>> MOLLIFY (new)'
+QUESTION_PATTERN = re.compile(r'^>> (\S+) \((?:new|learning|reviewing|mastered)\)$')
+
+
+class StubDatamuse(object):
+    """
+    Stand-in for the datamuse api: a definition matches exactly the word it spells out.
+    """
+
+    def words(self, **kwargs):
+        return [{'word': kwargs['ml']}]
+
+
+class Console(object):
+    """
+    Stand-in for stdout that discards output but remembers the last word the learner was asked to define.
+    """
+
+    def __init__(self):
+        self.word = None
+
+    def write(self, text):
+        for line in text.splitlines():
+            match = QUESTION_PATTERN.match(line)
+            if match:
+                self.word = match.group(1).lower()
+        return len(text)
+
+    def flush(self):
+        pass
+
+
+class Learner(object):
+    """
+    Scripted input() for a simulated learner.
+
+    A learner either follows a pattern of correct ('y') and incorrect ('n') answers or answers correctly with a
+    probability that grows every time they see a word.
+    """
+
+    def __init__(self, console, cards, seed, pattern=None, recall=0.3, learn_rate=0.2):
+        self.console = console
+        self.cards = cards
+        self.rng = random.Random(seed)
+        self.pattern = pattern
+        self.recall = recall
+        self.learn_rate = learn_rate
+        self.exposures = {}
+        self.answered = 0
+        self.last_answer = None
+        self.latencies = []
+
+    def __call__(self, prompt=''):
+        # time spent by the shell between two answers
+        now = time.perf_counter()
+        if self.last_answer is not None:
+            self.latencies.append(now - self.last_answer)
+
+        if self.answered >= self.cards:
+            return 'e'
+
+        word = self.console.word
+        self.answered += 1
+        self.last_answer = time.perf_counter()
+        return word if self._knows(word) else WRONG_ANSWER
+
+    def _knows(self, word):
+        """
+        :param word: (str) word to define
+        :return: (bool) true if learner answers correctly
+        """
+
+        if self.pattern:
+            return self.pattern[(self.answered - 1) % len(self.pattern)] == 'y'
+
+        seen = self.exposures.get(word, 0)
+        self.exposures[word] = seen + 1
+        p = 1 - (1 - self.recall) * (1 - self.learn_rate) ** seen
+        return self.rng.random() < p
+
+
+def run_learner(args):
+    """
+    Run one simulated learner through a test session in a fresh data directory.
+
+    :param args: (tuple) learner index, number of cards, seed, vocab path, answer pattern
+    :return: (dict) per card latencies, time spent saving and total time of the session
+    """
+
+    index, cards, seed, vocab_path, pattern = args
+    random.seed(seed + index)
+
+    with tempfile.TemporaryDirectory() as data_dir:
+        # point all data files at the learner's own directory
+        prog.PROGRESS_DIR = data_dir
+        prog.VOCAB_SETS_PATH = join(data_dir, prog.VOCAB_SETS_JSON_FILENAME)
+        history.HISTORY_DIR = join(data_dir, 'history')
+        makedirs(history.HISTORY_DIR)
+        prog.save_vocab_sets_data({})
+        prog.load_vocab_sets_data()
+        history.load()
+        prog.add_vocab(SET_NAME, vocab_path)
+        lookup.datamuse_api = StubDatamuse()
+
+        console = Console()
+        learner = Learner(console, cards, seed + index, pattern)
+        # time the save at the end of the session, not flushes of full history chunks while testing
+        save_times = []
+        commands._save_session = _timed(commands._save_session, save_times)
+
+        stdin = builtins.input
+        stdout = sys.stdout
+        builtins.input = learner
+        sys.stdout = console
+        start = time.perf_counter()
+        try:
+            Shell().onecmd('test {}'.format(SET_NAME))
+        finally:
+            builtins.input = stdin
+            sys.stdout = stdout
+        total = time.perf_counter() - start
+
+    return {'latencies': learner.latencies, 'save': sum(save_times), 'total': total}
+
+
+def simulate(learners, cards, seed=0, processes=None, vocab_path=DEFAULT_VOCAB_PATH, pattern=None):
+    """
+    Run simulated learners across processes.
+
+    :param learners: (int) number of learners
+    :param cards: (int) number of cards each learner answers
+    :param seed: (int) seed for random number generators
+    :param processes: (optional) (int) number of processes, defaults to the number of cpus
+    :param vocab_path: (str) path of file containing vocab words
+    :param pattern: (optional) (str) answers of scripted learners e.g. 'yyn', probabilistic learners if None
+    :return: (dict) results of each learner and wall clock time of the run
+    """
+
+    jobs = [(i, cards, seed, vocab_path, pattern) for i in range(learners)]
+
+    # a fresh process per learner so no state leaks between learners, one job per task for maxtasksperchild to hold
+    start = time.perf_counter()
+    with Pool(processes, maxtasksperchild=1) as pool:
+        results = pool.map(run_learner, jobs, chunksize=1)
+    wall = time.perf_counter() - start
+
+    return {'results': results, 'wall': wall}
+
+
+def print_report(run):
+    """
+    Print throughput, per card latency and save cost of a run.
+
+    :param run: (dict) output of simulate
+    """
+
+    results = run['results']
+    latencies = np.concatenate([np.array(r['latencies']) for r in results])
+    saves = np.array([r['save'] for r in results])
+    cards = latencies.size
+
+    print('learners: {}, cards: {}, wall time: {:.2f}s'.format(len(results), cards, run['wall']))
+    print('cards/s: {:.1f} overall, {:.1f} per learner'.format(
+        cards / run['wall'], np.mean([len(r['latencies']) / r['total'] for r in results])))
+    if cards:
+        p50, p90, p99 = np.percentile(latencies, (50, 90, 99)) * 1000
+        print('per card latency: p50 {:.2f}ms, p90 {:.2f}ms, p99 {:.2f}ms, max {:.2f}ms'.format(
+            p50, p90, p99, latencies.max() * 1000))
+    print('final save: mean {:.2f}ms, max {:.2f}ms'.format(saves.mean() * 1000, saves.max() * 1000))
+
+
+def _timed(function, times):
+    """
+    Wrap a function to record how long each call takes.
+
+    :param function: (func pointer) function to wrap
+    :param times: (list) list to append durations to
+    :return: (func pointer) wrapped function
+    """
+
+    def wrapper(*args, **kwargs):
+        start = time.perf_counter()
+        result = function(*args, **kwargs)
+        times.append(time.perf_counter() - start)
+        return result
+
+    return wrapper
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Drive the vocabtester shell with simulated learners.')
+    parser.add_argument('-n', '--learners', type=int, default=4, help='number of simulated learners')
+    parser.add_argument('-m', '--cards', type=int, default=100, help='number of cards per learner')
+    parser.add_argument('-p', '--processes', type=int, default=None, help='number of processes')
+    parser.add_argument('-s', '--seed', type=int, default=0, help='random seed')
+    parser.add_argument('--vocab', default=DEFAULT_VOCAB_PATH, help='path of file containing vocab words')
+    parser.add_argument('--pattern', default=None,
+                        help='scripted answers, e.g. "yyn", instead of probabilistic learners')
+    args = parser.parse_args()
+
+    print_report(simulate(args.learners, args.cards, args.seed, args.processes, args.vocab, args.pattern))
@@ -0,0 +1,306 @@
+"""
+Binary progress snapshots for huge vocab sets.
+
+A snapshot holds the same progress as a progress json file in fixed-width columns, all little-endian:
+
+- header: magic, version, number of words and size of the string table
+- offsets: (number of words + 1) uint64 offsets into the string table
+- string table: utf-8 words sorted by their bytes
+- due: float64 unix time each word is due, 0 if not scheduled
+- consecutive: uint16 per word
+- category: uint8 per word
+
+Opening a snapshot maps the file instead of parsing it, looking up a word is a binary search and updating a word
+writes only its own record. Rewriting a snapshot keeps the due time of every word it still holds. The columns are
+mapped as they are, so snapshots can only be opened on little-endian machines.
+
+Author: Cathy Jiao
+"""
+
+import json
+import mmap
+import struct
+import sys
+from array import array
+from collections.abc import MutableMapping, ItemsView, ValuesView
+from os import replace
+
+# globals
+SNAPSHOT_EXTENSION = '.snap'
+MAGIC = b'VTSN'
+VERSION = 1
+HEADER = struct.Struct('<4sHHIQ')
+# keep columns 8 byte aligned
+HEADER_SIZE = 24
+
+
+class Snapshot(MutableMapping):
+    """
+    Progress of a vocab set backed by a memory mapped snapshot: word -> [category, consecutive].
+
+    Words can be updated but not added or removed.
+    """
+
+    def __init__(self, path):
+        if sys.byteorder != 'little':
+            raise ValueError('progress snapshots can only be opened on little-endian machines')
+
+        self.path = path
+        self._file = open(path, 'r+b')
+        self._mmap = mmap.mmap(self._file.fileno(), 0)
+
+        magic, version, _, count, strings_size = HEADER.unpack_from(self._mmap)
+        if magic != MAGIC or version != VERSION:
+            self.close()
+            raise ValueError('{} is not a progress snapshot'.format(path))
+
+        # views over each section of the file
+        view = memoryview(self._mmap)
+        pos = HEADER_SIZE
+        self._count = count
+        self._offsets = view[pos:pos + 8 * (count + 1)].cast('Q')
+        pos += 8 * (count + 1)
+        self._strings = view[pos:pos + strings_size]
+        pos += _align(strings_size)
+        self._due = view[pos:pos + 8 * count].cast('d')
+        pos += 8 * count
+        self._consecutive = view[pos:pos + 2 * count].cast('H')
+        pos += 2 * count
+        self._category = view[pos:pos + count]
+        self._view = view
+
+    def __len__(self):
+        return self._count
+
+    def __iter__(self):
+        for i in range(self._count):
+            yield self._word(i)
+
+    def __contains__(self, word):
+        return self._find(word) is not None
+
+    def __getitem__(self, word):
+        i = self._index(word)
+        return [self._category[i], self._consecutive[i]]
+
+    def __setitem__(self, word, info):
+        i = self._index(word)
+        self._category[i] = info[0]
+        self._consecutive[i] = info[1]
+
+    def __delitem__(self, word):
+        raise TypeError('words cannot be removed from a snapshot')
+
+    def items(self):
+        return _SnapshotItemsView(self)
+
+    def values(self):
+        return _SnapshotValuesView(self)
+
+    def get_due(self, word):
+        """
+        :param word: (str)
+        :return: (float) unix time word is due, 0 if not scheduled
+        """
+
+        return self._due[self._index(word)]
+
+    def set_due(self, word, due):
+        """
+        :param word: (str)
+        :param due: (float) unix time word is due
+        """
+
+        self._due[self._index(word)] = due
+
+    def flush(self):
+        """
+        Write updated records back to the file.
+        """
+
+        self._mmap.flush()
+
+    def close(self):
+        """
+        Flush and unmap the snapshot.
+        """
+
+        for name in ('_offsets', '_strings', '_due', '_consecutive', '_category', '_view'):
+            if hasattr(self, name):
+                getattr(self, name).release()
+        self._mmap.close()
+        self._file.close()
+
+    def _word(self, i):
+        """
+        :param i: (int) index of word
+        :return: (str) word
+        """
+
+        return self._strings[self._offsets[i]:self._offsets[i + 1]].tobytes().decode('utf-8')
+
+    def _index(self, word):
+        """
+        :param word: (str)
+        :return: (int) index of word
+        """
+
+        i = self._find(word)
+        if i is None:
+            raise KeyError(word)
+        return i
+
+    def _find(self, word):
+        """
+        Binary search the string table.
+
+        :param word: (str)
+        :return: (int) index of word or None if word is not in snapshot
+        """
+
+        key = word.encode('utf-8')
+        lo, hi = 0, self._count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self._strings[self._offsets[mid]:self._offsets[mid + 1]].tobytes() < key:
+                lo = mid + 1
+            else:
+                hi = mid
+        if lo < self._count and self._strings[self._offsets[lo]:self._offsets[lo + 1]].tobytes() == key:
+            return lo
+        return None
+
+
+class _SnapshotItemsView(ItemsView):
+    """
+    Items of a snapshot, read in file order instead of looking up every word.
+    """
+
+    def __iter__(self):
+        snapshot = self._mapping
+        for i in range(len(snapshot)):
+            yield snapshot._word(i), [snapshot._category[i], snapshot._consecutive[i]]
+
+
+class _SnapshotValuesView(ValuesView):
+    """
+    Values of a snapshot, read in file order instead of looking up every word.
+    """
+
+    def __iter__(self):
+        snapshot = self._mapping
+        for i in range(len(snapshot)):
+            yield [snapshot._category[i], snapshot._consecutive[i]]
+
+
+def is_snapshot(path):
+    """
+    :param path: (str) path of a progress file
+    :return: (bool) true if path is a snapshot rather than a json file
+    """
+
+    return path.endswith(SNAPSHOT_EXTENSION)
+
+
+def open_snapshot(path):
+    """
+    Open a snapshot.
+
+    :param path: (str) path of snapshot
+    :return: (Snapshot) progress of vocab set or None if file is not found
+    """
+
+    try:
+        return Snapshot(path)
+    except FileNotFoundError:
+        return None
+
+
+def write_snapshot(path, _word_to_progress, word_to_due=None):
+    """
+    Write progress of a vocab set to a new snapshot.
+
+    :param path: (str) path to save snapshot to
+    :param _word_to_progress: (json) word -> [category, consecutive]
+    :param word_to_due: (optional) (dict) word -> unix time word is due, taken from the snapshot at path by default
+    """
+
+    if word_to_due is None:
+        word_to_due = _load_dues(path)
+    encoded = sorted((word.encode('utf-8'), word) for word in _word_to_progress)
+
+    offsets = array('Q', [0])
+    for key, _ in encoded:
+        offsets.append(offsets[-1] + len(key))
+    strings = b''.join(key for key, _ in encoded)
+
+    due = array('d', (word_to_due.get(word, 0.0) for _, word in encoded))
+    consecutive = array('H', (_word_to_progress[word][1] for _, word in encoded))
+    category = array('B', (_word_to_progress[word][0] for _, word in encoded))
+    if sys.byteorder != 'little':
+        for column in (offsets, due, consecutive):
+            column.byteswap()
+
+    # write to a temporary file first so an open snapshot of the old file stays valid
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'wb') as file:
+        file.write(HEADER.pack(MAGIC, VERSION, 0, len(encoded), len(strings)).ljust(HEADER_SIZE, b'\0'))
+        file.write(offsets.tobytes())
+        file.write(strings.ljust(_align(len(strings)), b'\0'))
+        file.write(due.tobytes())
+        file.write(consecutive.tobytes())
+        file.write(category.tobytes())
+    replace(tmp_path, path)
+
+
+def json_to_snapshot(json_path, snapshot_path):
+    """
+    Convert a progress json file to a snapshot.
+
+    :param json_path: (str) path of progress json file
+    :param snapshot_path: (str) path to save snapshot to
+    """
+
+    with open(json_path, 'r') as file:
+        write_snapshot(snapshot_path, json.load(file))
+
+
+def snapshot_to_json(snapshot_path, json_path):
+    """
+    Convert a snapshot to a progress json file.
+
+    :param snapshot_path: (str) path of snapshot
+    :param json_path: (str) path to save progress json file to
+    """
+
+    snapshot = Snapshot(snapshot_path)
+    _word_to_progress = dict(snapshot.items())
+    snapshot.close()
+
+    with open(json_path, 'w+') as file:
+        json.dump(_word_to_progress, file, indent=4)
+
+
+def _load_dues(path):
+    """
+    :param path: (str) path of a snapshot
+    :return: (dict) word -> unix time word is due, for scheduled words of the snapshot at path, empty if there is none
+    """
+
+    if sys.byteorder != 'little':
+        return {}
+    snapshot = open_snapshot(path)
+    if snapshot is None:
+        return {}
+    word_to_due = {snapshot._word(i): due for i, due in enumerate(snapshot._due) if due}
+    snapshot.close()
+    return word_to_due
+
+
+def _align(size):
+    """
+    :param size: (int) size in bytes
+    :return: (int) size rounded up to a multiple of 8
+    """
+
+    return (size + 7) // 8 * 8